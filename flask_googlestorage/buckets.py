@@ -1,5 +1,7 @@
 import base64
+import glob
 import hashlib
+import weakref
 from contextlib import contextmanager
 from typing import Union, Callable
 from pathlib import PurePath, Path
@@ -28,6 +30,8 @@ class LocalBucket:
     :param resolve_conflicts: Whether to resolve name conflicts or not.
     """
 
+    __slots__ = ("name", "destination", "resolve_conflicts")
+
     def __init__(
         self,
         name: str,
@@ -75,6 +79,17 @@ class LocalBucket:
         if self.resolve_conflicts and filepath.exists():
             stem, suffix = path.stem, path.suffix
             count = 0
+            # A single directory scan for the highest counter in use avoids probing
+            # candidate names one stat at a time
+            pattern = f"{glob.escape(stem)}_*{glob.escape(suffix)}"
+            for existing in filepath.parent.glob(pattern):
+                counter = existing.name[len(stem) + 1:len(existing.name) - len(suffix)]
+                # isdecimal() accepts exactly the characters int() parses, unlike isdigit()
+                if counter.isdecimal():
+                    count = max(count, int(counter))
+
+            # The scan already yields a free name; keep probing just in case so an
+            # existing file is never overwritten
             while filepath.exists():
                 count += 1
                 path = path.with_name(f"{stem}_{count}{suffix}")
@@ -119,6 +134,8 @@ class CloudBucket:
                     decorator.
     """
 
+    __slots__ = ("bucket", "delete_local", "signature", "tenacity", "local")
+
     def __init__(
         self,
         name: str,
@@ -246,6 +263,8 @@ class Bucket:
                    to be used.
     """
 
+    __slots__ = ("name", "_allows", "_storage", "_storage_cache", "__weakref__")
+
     def __init__(self, name: str, allows: Callable = None):
         if not name.isalnum():
             raise ValueError("Name must be alphanumeric (no underscores)")
@@ -255,6 +274,7 @@ class Bucket:
 
         self._allows = allows
         self._storage = None
+        self._storage_cache = weakref.WeakKeyDictionary()
 
     @contextmanager
     def storage_ctx(self, storage: Union[LocalBucket, CloudBucket]):
@@ -289,11 +309,18 @@ class Bucket:
         if self._storage:
             return self._storage
 
-        cfg = get_state(current_app)["buckets"]
-        try:
-            return cfg[self.name]
-        except KeyError:
-            raise NotFoundBucketError(f"Storage for bucket '{self.name}' not found")
+        # Memoize the lookup per application instance; the extension state does not
+        # change after init_app so the dict lookups only need to happen once per app
+        app = current_app._get_current_object()
+        storage = self._storage_cache.get(app)
+        if storage is None:
+            cfg = get_state(app).buckets
+            try:
+                storage = self._storage_cache[app] = cfg[self.name]
+            except KeyError:
+                raise NotFoundBucketError(f"Storage for bucket '{self.name}' not found")
+
+        return storage
 
     def allows(self, file_storage: FileStorage, path: PurePath) -> bool:
         """
@@ -6,6 +6,7 @@ from google import auth, cloud
 
 from .exceptions import NotFoundDestinationError
 from .buckets import LocalBucket, CloudBucket, Bucket
+from .utils import GoogleStorageState
 
 
 class GoogleStorage:
@@ -45,9 +46,7 @@ class GoogleStorage:
             self._client = None
 
         app.extensions = getattr(app, "extensions", {})
-        ext = app.extensions.setdefault("googlestorage", {})
-        ext["ext_obj"] = self
-        ext["buckets"] = {}
+        state = app.extensions["googlestorage"] = GoogleStorageState(self)
 
         self._resolve_conflicts = app.config.get(f"{self._prefix}_RESOLVE_CONFLICTS", False)
         self._delete_local = app.config.get(f"{self._prefix}_DELETE_LOCAL", True)
@@ -55,7 +54,7 @@ class GoogleStorage:
         self._tenacity = app.config.get(f"{self._prefix}_TENACITY")
 
         for bucket in self.buckets:
-            ext["buckets"][bucket.name] = self._create_bucket(uploads_dest, bucket)
+            state.buckets[bucket.name] = self._create_bucket(uploads_dest, bucket)
 
     def _create_bucket(self, uploads_dest: Path, bucket: Bucket) -> Union[LocalBucket, CloudBucket]:
         cfg = self._app.config
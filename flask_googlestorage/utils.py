@@ -1,11 +1,69 @@
+import os.path
+import re
+import sys
 from pathlib import PurePath
+from typing import Callable
 from uuid import uuid4
 
 from flask import Flask
 from werkzeug.utils import secure_filename
 
+_ext_cache = {}
+_ext_cache_limit = 128
 
-def get_state(app: Flask) -> dict:
+_safe_filename_re = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]*\Z")
+
+
+def _secure_filename(filename: str) -> str:
+    # Names that are fixed points of werkzeug's sanitization (safe ASCII characters, no
+    # leading or trailing dots/underscores) are the common case; recognizing them with a
+    # single regex match skips werkzeug's multi-pass rewriting. On Windows werkzeug also
+    # renames device names such as CON.txt, so the fast path is POSIX-only.
+    if os.name != "nt" and _safe_filename_re.match(filename) and filename[-1] not in "._":
+        return filename
+
+    return secure_filename(filename)
+
+
+def _lower_ext(ext: str) -> str:
+    """
+    Returns the given extension in lower case. Since most applications deal with a small set of
+    extensions, results are interned and cached so that repeated extensions share a single string
+    object. The extension comes from client-controlled filenames, so the cache is capped to keep
+    an attacker sending ever-changing extensions from growing it without bound.
+
+    :param ext: The file extension, including the leading dot.
+
+    :returns: The extension in lower case.
+    """
+    lower = _ext_cache.get(ext)
+    if lower is None:
+        lower = ext.lower()
+        if len(_ext_cache) < _ext_cache_limit:
+            lower = _ext_cache[ext] = sys.intern(lower)
+
+    return lower
+
+
+class GoogleStorageState:
+    """
+    The extension state stored per application. A slotted object is used instead of a plain
+    dictionary so consumers reach the configured buckets through a single attribute access.
+
+    :param ext_obj: The extension instance registered to the application.
+    """
+
+    __slots__ = ("ext_obj", "buckets")
+
+    def __init__(self, ext_obj):
+        #: The :py:class:`flask_googlestorage.GoogleStorage` instance.
+        self.ext_obj = ext_obj
+
+        #: The storage object configured for each bucket name.
+        self.buckets = {}
+
+
+def get_state(app: Flask) -> GoogleStorageState:
     """
     Gets the extension state for the given application
 
@@ -19,6 +77,28 @@ def get_state(app: Flask) -> dict:
     return app.extensions["googlestorage"]
 
 
+def allowed_extensions(*extensions: str) -> Callable:
+    """
+    Returns a callable suitable for the ``allows`` parameter of
+    :py:class:`flask_googlestorage.Bucket` which accepts files by their extension. Extensions are
+    compiled once into a frozenset so each check is a single O(1) membership test::
+
+        images = Bucket("images", allows=allowed_extensions("jpg", "png", "gif"))
+
+    :param extensions: The allowed extensions, with or without the leading dot.
+
+    :returns: A callable checking the secured path's extension against the given set.
+    """
+    allowed = frozenset(
+        _lower_ext(ext if ext.startswith(".") else f".{ext}") for ext in extensions
+    )
+
+    def allows(file_storage, path: PurePath) -> bool:
+        return path.suffix in allowed
+
+    return allows
+
+
 def secure_path(filename: str, name: str = None, uuid_name: bool = True) -> PurePath:
     """
     This is a helper used by :py:func:`flask_googlestorage.Bucket.save` to get a secured path. with
@@ -32,6 +112,8 @@ def secure_path(filename: str, name: str = None, uuid_name: bool = True) -> Pure
 
     :returns: A secured filename with the extension in lower case
     """
+    # PurePath.suffix has no cheap os.path equivalent: splitext diverges on names like
+    # '..txt' and basename on trailing slashes or '.' components
     ext = PurePath(filename).suffix
 
     if name:
@@ -43,13 +125,16 @@ def secure_path(filename: str, name: str = None, uuid_name: bool = True) -> Pure
         if suffix:
             ext = suffix
 
-        secure_parent = PurePath(*(secure_filename(part) for part in parent.parts if part != ".."))
-        secure_name = secure_filename(path.name)
+        # Flat names are the common case; skip the parent path composition entirely
+        parent_parts = parent.parts
+        secure_parent = PurePath(*map(_secure_filename, parent_parts)) if parent_parts else ""
+        secure_name = _secure_filename(path.name)
     else:
         secure_parent = ""
-        secure_name = str(uuid4()) if uuid_name else secure_filename(filename)
+        secure_name = str(uuid4()) if uuid_name else _secure_filename(filename)
 
     if not secure_name:
         secure_name = str(uuid4())
 
-    return secure_parent / PurePath(secure_name).with_suffix(ext.lower())
+    root, _ = os.path.splitext(secure_name)
+    return secure_parent / PurePath(root + _lower_ext(ext))
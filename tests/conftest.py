@@ -1,10 +1,12 @@
+import os
 import io
-import pathlib
+import shutil
 from unittest import mock
 
 import pytest
 import filetype
 from flask import Flask
+from google.cloud import storage
 from google.cloud.exceptions import NotFound, GoogleCloudError
 from tenacity import wait_fixed, stop_after_attempt
 from werkzeug.datastructures import FileStorage
@@ -18,55 +20,123 @@ from flask_googlestorage import (
 )
 
 
+SEED_FILES = [("foo.txt", b"Foo content"), ("bar.txt", b"Bar content")]
+
+INIT_CONFIG = {"GOOGLE_STORAGE_LOCAL_DEST": "/var/uploads"}
+
+CLOUD_CONFIG = {
+    "GOOGLE_STORAGE_FILES_BUCKET": "files-bucket",
+    "GOOGLE_STORAGE_PHOTOS_BUCKET": "photos-bucket",
+}
+
+RETRY_CONFIG = {
+    **CLOUD_CONFIG,
+    "GOOGLE_STORAGE_TENACITY": {"stop": stop_after_attempt(2)},
+    "GOOGLE_STORAGE_FILES_TENACITY": {
+        "stop": stop_after_attempt(4),
+        "wait": wait_fixed(1),
+    },
+}
+
+
+_buckets_cache = {}
+
+
+def init_storage(app, *names):
+    # Bucket instances hold no per-app state (storage is resolved through current_app),
+    # so the same instances can be wired to every test app.
+    buckets = _buckets_cache.get(names)
+    if buckets is None:
+        buckets = _buckets_cache[names] = tuple(Bucket(name) for name in names)
+
+    GoogleStorage(*buckets, app=app)
+
+    return buckets
+
+
 @pytest.fixture
 def app():
+    # Each test configures its own buckets and blueprints, so the app cannot be shared
+    # across tests; keep its construction as light as possible instead.
     app = Flask("test")
     app.config["TESTING"] = True
 
-    ctx = app.app_context()
-    ctx.push()
-    yield app
-    ctx.pop()
-
+    with app.app_context():
+        yield app
 
-@pytest.fixture
-def app_init(app):
-    app.config.update({"GOOGLE_STORAGE_LOCAL_DEST": "/var/uploads"})
 
-    files, photos = Bucket("files"), Bucket("photos")
+@pytest.fixture(scope="module")
+def _app_init():
+    # The defaults app never touches the filesystem, so one instance per module is enough
+    app = Flask("test")
+    app.config["TESTING"] = True
+    app.config.update(INIT_CONFIG)
 
-    storage = GoogleStorage(files, photos)
-    storage.init_app(app)
+    init_storage(app, "files", "photos")
 
     return app
 
 
 @pytest.fixture
-def app_local(app, tmpdir):
-    app.config.update({"GOOGLE_STORAGE_LOCAL_DEST": str(tmpdir)})
+def app_init(_app_init):
+    # Push the context per test so no app leaks into tests that must run without one
+    with _app_init.app_context():
+        yield _app_init
 
-    files = Bucket("files")
 
-    storage = GoogleStorage(files)
-    storage.init_app(app)
+@pytest.fixture(scope="session")
+def seed_template(tmp_path_factory):
+    # Write the seed files once per session; app fixtures copy this template into the
+    # bucket destination instead of re-saving the uploads for every test.
+    template = tmp_path_factory.mktemp("seed")
+    for filename, content in SEED_FILES:
+        fd = os.open(template / filename, os.O_WRONLY | os.O_CREAT)
+        try:
+            os.write(fd, content)
+        finally:
+            os.close(fd)
 
-    files.save(
-        FileStorage(stream=io.BytesIO(b"Foo content"), filename="foo.txt"),
-        uuid_name=False,
-    )
-    files.save(
-        FileStorage(stream=io.BytesIO(b"Bar content"), filename="bar.txt"),
-        uuid_name=False,
-    )
+    return template
+
+
+@pytest.fixture
+def app_local(app, tmp_path, seed_template):
+    app.config.update({"GOOGLE_STORAGE_LOCAL_DEST": os.fspath(tmp_path)})
+
+    init_storage(app, "files")
+    shutil.copytree(seed_template, tmp_path / "files")
 
     return app
 
 
+@pytest.fixture
+def local_request_ctx(app_local):
+    with app_local.test_request_context():
+        yield
+
+
+@pytest.fixture
+def cloud_request_ctx(app_cloud):
+    with app_cloud.test_request_context():
+        yield
+
+
 @pytest.fixture
 def bucket():
     return Bucket("files")
 
 
+@pytest.fixture(scope="module")
+def deny_all_bucket():
+    # Buckets are stateless, so one instance can serve every parametrized case
+    return Bucket("files", allows=lambda f, p: False)
+
+
+@pytest.fixture(scope="module")
+def no_exe_bucket():
+    return Bucket("files", allows=lambda f, p: p.suffix != ".exe")
+
+
 class ImagesBucket(Bucket):
     def allows(self, file_storage, path):
         matched = filetype.image_match(file_storage.read())
@@ -86,8 +156,8 @@ def images_bucket():
 
 
 @pytest.fixture
-def local_bucket(tmpdir):
-    return LocalBucket("files", pathlib.Path(tmpdir))
+def local_bucket(tmp_path):
+    return LocalBucket("files", tmp_path)
 
 
 @pytest.fixture
@@ -95,10 +165,10 @@ def empty_txt():
     return FileStorage(io.BytesIO(), filename="empty.txt")
 
 
-@pytest.fixture
-def google_bucket_mock():
-    bucket = mock.MagicMock()
-    blob = mock.MagicMock()
+@pytest.fixture(scope="session")
+def _google_bucket_mock():
+    bucket = mock.MagicMock(spec=storage.Bucket)
+    blob = mock.MagicMock(spec=storage.Blob)
     public_url = mock.PropertyMock(return_value="http://google-storage-url/foo.txt")
 
     type(blob).public_url = public_url
@@ -115,6 +185,15 @@ def google_bucket_mock():
     bucket.blob.side_effect = get_named_blob
     bucket.get_blob.side_effect = get_blob
 
+    return bucket, blob
+
+
+@pytest.fixture
+def google_bucket_mock(_google_bucket_mock):
+    bucket, blob = _google_bucket_mock
+    bucket.reset_mock()
+    blob.reset_mock()
+
     return bucket
 
 
@@ -134,65 +213,37 @@ def google_storage_mock(google_bucket_mock):
 
 
 @pytest.fixture
-def cloud_bucket(google_bucket_mock, tmpdir):
-    return CloudBucket("files", google_bucket_mock, pathlib.Path(tmpdir))
+def cloud_bucket(google_bucket_mock, tmp_path):
+    return CloudBucket("files", google_bucket_mock, tmp_path)
 
 
 @pytest.fixture
-def app_cloud(google_storage_mock, app, tmpdir):
+def app_cloud(google_storage_mock, app, tmp_path, seed_template):
     app.config.update(
-        {
-            "GOOGLE_STORAGE_LOCAL_DEST": str(tmpdir),
-            "GOOGLE_STORAGE_FILES_BUCKET": "files-bucket",
-            "GOOGLE_STORAGE_FILES_DELETE_LOCAL": False,
-            "GOOGLE_STORAGE_PHOTOS_BUCKET": "photos-bucket",
-        }
+        CLOUD_CONFIG,
+        GOOGLE_STORAGE_LOCAL_DEST=os.fspath(tmp_path),
+        GOOGLE_STORAGE_FILES_DELETE_LOCAL=False,
     )
 
-    files, photos = Bucket("files"), Bucket("photos")
-
-    storage = GoogleStorage(files, photos)
-    storage.init_app(app)
-
-    files.save(
-        FileStorage(stream=io.BytesIO(b"Foo content"), filename="foo.txt"),
-        uuid_name=False,
-    )
-    files.save(
-        FileStorage(stream=io.BytesIO(b"Bar content"), filename="bar.txt"),
-        uuid_name=False,
-    )
+    init_storage(app, "files", "photos")
+    shutil.copytree(seed_template, tmp_path / "files")
 
     return app
 
 
 @pytest.fixture
-def app_cloud_default(google_storage_mock, app, tmpdir):
-    app.config.update(
-        {
-            "GOOGLE_STORAGE_LOCAL_DEST": str(tmpdir),
-            "GOOGLE_STORAGE_FILES_BUCKET": "files-bucket",
-            "GOOGLE_STORAGE_PHOTOS_BUCKET": "photos-bucket",
-        }
-    )
+def app_cloud_default(google_storage_mock, app, tmp_path):
+    app.config.update(CLOUD_CONFIG, GOOGLE_STORAGE_LOCAL_DEST=os.fspath(tmp_path))
 
-    files, photos = Bucket("files"), Bucket("photos")
-
-    storage = GoogleStorage(files, photos)
-    storage.init_app(app)
+    init_storage(app, "files", "photos")
 
     return app
 
 
-@pytest.fixture
-def google_bucket_error_mock():
-    bucket = mock.MagicMock()
-    blob = mock.MagicMock()
-    blob.upload_from_filename.side_effect = [
-        GoogleCloudError("error 1"),
-        GoogleCloudError("error 2"),
-        None,
-    ]
+@pytest.fixture(scope="session")
+def _google_bucket_error_mock():
+    bucket = mock.MagicMock(spec=storage.Bucket)
+    blob = mock.MagicMock(spec=storage.Blob)
 
     def get_named_blob(name):
         type(blob).name = name
@@ -201,6 +252,22 @@ def google_bucket_error_mock():
     bucket.blob.side_effect = get_named_blob
     bucket.get_blob.return_value = blob
 
+    return bucket, blob
+
+
+@pytest.fixture
+def google_bucket_error_mock(_google_bucket_error_mock):
+    bucket, blob = _google_bucket_error_mock
+    bucket.reset_mock()
+    blob.reset_mock()
+
+    # The side effects are consumed by the retry tests, so they must be re-armed per test
+    blob.upload_from_filename.side_effect = [
+        GoogleCloudError("error 1"),
+        GoogleCloudError("error 2"),
+        None,
+    ]
+
     return bucket
 
 
@@ -213,23 +280,9 @@ def google_storage_error_mock(google_bucket_error_mock):
 
 
 @pytest.fixture
-def app_cloud_retry(google_storage_error_mock, app, tmpdir):
-    app.config.update(
-        {
-            "GOOGLE_STORAGE_LOCAL_DEST": str(tmpdir),
-            "GOOGLE_STORAGE_TENACITY": {"stop": stop_after_attempt(2)},
-            "GOOGLE_STORAGE_FILES_BUCKET": "files-bucket",
-            "GOOGLE_STORAGE_PHOTOS_BUCKET": "photos-bucket",
-            "GOOGLE_STORAGE_FILES_TENACITY": {
-                "stop": stop_after_attempt(4),
-                "wait": wait_fixed(1),
-            },
-        }
-    )
-
-    files, photos = Bucket("files"), Bucket("photos")
+def app_cloud_retry(google_storage_error_mock, app, tmp_path):
+    app.config.update(RETRY_CONFIG, GOOGLE_STORAGE_LOCAL_DEST=os.fspath(tmp_path))
 
-    storage = GoogleStorage(files, photos)
-    storage.init_app(app)
+    init_storage(app, "files", "photos")
 
     return app
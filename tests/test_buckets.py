@@ -1,3 +1,5 @@
+import io
+import os
 import pathlib
 from unittest import mock
 
@@ -11,46 +13,47 @@ from flask_googlestorage import Bucket
 from flask_googlestorage.exceptions import NotFoundBucketError, NotAllowedUploadError
 
 
+def precreate_conflicts(local_bucket, path, count=0):
+    parent = local_bucket.destination / path.parent
+    parent.mkdir(parents=True, exist_ok=True)
+    # os.open with O_CREAT is a single syscall per file, unlike Path.touch
+    os.close(os.open(parent / path.name, os.O_CREAT))
+    for n in range(1, count + 1):
+        os.close(os.open(parent / f"{path.stem}_{n}{path.suffix}", os.O_CREAT))
+
+
 def test_name_alnum():
-    with pytest.raises(ValueError) as e_info:
+    with pytest.raises(ValueError, match=r"Name must be alphanumeric \(no underscores\)"):
         Bucket("my_files")
 
-    assert str(e_info.value) == "Name must be alphanumeric (no underscores)"
-
 
 def test_config_runtime_error(bucket):
-    with pytest.raises(RuntimeError) as e_info:
+    with pytest.raises(RuntimeError, match="Working outside of application context"):
         bucket.storage  # pylint: disable=pointless-statement
 
-    assert "Working outside of application context." in str(e_info.value)
-
 
 def test_config_not_init_error(app, bucket):
-    with pytest.raises(AssertionError) as e_info:
+    with pytest.raises(
+        AssertionError,
+        match=r"The googlestorage extension was not registered to the current "
+        r"application\. Please make sure to call init_app\(\) first\.",
+    ):
         bucket.storage  # pylint: disable=pointless-statement
 
-    assert str(e_info.value) == (
-        "The googlestorage extension was not registered to the current "
-        "application. Please make sure to call init_app() first."
-    )
-
 
 def test_config_not_found_error(app_init):
-    with pytest.raises(NotFoundBucketError) as e_info:
+    with pytest.raises(NotFoundBucketError, match="Storage for bucket 'music' not found"):
         bucket = Bucket("music")
         bucket.storage  # pylint: disable=pointless-statement
 
-    assert str(e_info.value) == "Storage for bucket 'music' not found"
-
 
 def test_save_error(bucket):
-    with pytest.raises(TypeError) as e_info:
+    with pytest.raises(
+        TypeError,
+        match=r"The given storage must be a werkzeug\.datastructures\.FileStorage instance",
+    ):
         bucket.save("not a FileStorage instance")
 
-    assert str(e_info.value) == (
-        "The given storage must be a werkzeug.datastructures.FileStorage instance"
-    )
-
 
 @pytest.mark.parametrize("filename", ("filename.exe", "filename.txt", "filename.jpg"))
 def test_bucket_save_all_allowed(filename, bucket):
@@ -61,38 +64,34 @@ def test_bucket_save_all_allowed(filename, bucket):
 
 
 @pytest.mark.parametrize("filename", ("filename.exe", "filename.txt", "filename.jpg"))
-def test_bucket_save_none_allowed(filename):
-    bucket = Bucket("files", allows=lambda f, p: False)
-    with pytest.raises(NotAllowedUploadError) as e_info:
-        bucket.save(FileStorage(filename=filename))
-
-    assert str(e_info.value) == "The given file is not allowed in this bucket"
+def test_bucket_save_none_allowed(filename, deny_all_bucket):
+    with pytest.raises(NotAllowedUploadError, match="The given file is not allowed in this bucket"):
+        deny_all_bucket.save(FileStorage(filename=filename))
 
 
 def test_bucket_save_images_allowed(datadir, images_bucket, local_bucket):
-    orig_file = datadir / "flask.jpg"
+    orig_content = (datadir / "flask.jpg").read_bytes()
     uploaded_file = local_bucket.destination / "flask.jpg"
 
     assert not uploaded_file.exists()
     with images_bucket.storage_ctx(local_bucket):
-        images_bucket.save(FileStorage(orig_file.open("rb")), name="flask.jpg")
+        images_bucket.save(
+            FileStorage(io.BytesIO(orig_content), filename="flask.jpg"), name="flask.jpg"
+        )
 
     assert uploaded_file.exists()
-    assert uploaded_file.read_bytes() == orig_file.read_bytes()
+    assert uploaded_file.read_bytes() == orig_content
 
-    with pytest.raises(NotAllowedUploadError) as e_info:
+    with pytest.raises(NotAllowedUploadError, match="Custom validation error message"):
         images_bucket.save(FileStorage((datadir / "foo.zip").open("rb")), name="foo.jpg")
 
-    assert str(e_info.value) == "Custom validation error message"
-
 
 @pytest.mark.parametrize(
     "filename, allowed",
     [("filename.exe", False), ("filename.txt", True), ("filename.jpg", True)],
 )
-def test_bucket_allows_by_extension(filename, allowed, empty_txt):
-    bucket = Bucket("files", allows=lambda f, p: p.suffix != ".exe")
-    assert bucket.allows(empty_txt, pathlib.PurePath(filename)) == allowed
+def test_bucket_allows_by_extension(filename, allowed, empty_txt, no_exe_bucket):
+    assert no_exe_bucket.allows(empty_txt, pathlib.PurePath(filename)) == allowed
 
 
 def test_storage_mocking(bucket):
@@ -115,25 +114,12 @@ def test_bucket_save(uuid_name, public, empty_txt, bucket):
     storage_mock.save.assert_called_with(empty_txt, secured_path, public=public)
 
 
-def test_bucket_delete(bucket):
-    with bucket.storage_ctx(mock.MagicMock()) as storage_mock:
-        bucket.delete("bar.txt")
-
-    storage_mock.delete.assert_called_with("bar.txt")
-
-
-def test_bucket_url(bucket):
-    with bucket.storage_ctx(mock.MagicMock()) as storage_mock:
-        bucket.url("bar.txt")
-
-    storage_mock.url.assert_called_with("bar.txt")
-
-
-def test_bucket_signed_url(bucket):
+@pytest.mark.parametrize("method", ("delete", "url", "signed_url"))
+def test_bucket_delegates(method, bucket):
     with bucket.storage_ctx(mock.MagicMock()) as storage_mock:
-        bucket.signed_url("bar.txt")
+        getattr(bucket, method)("bar.txt")
 
-    storage_mock.signed_url.assert_called_with("bar.txt")
+    getattr(storage_mock, method).assert_called_with("bar.txt")
 
 
 @pytest.mark.parametrize("path", ("foo.txt", "foo/file.txt", "foo/bar/file.tx"))
@@ -154,19 +140,15 @@ def test_local_save(path, empty_txt, local_bucket):
         (True, "foo/bar/foo.txt", "foo/bar/foo_1.txt"),
         (False, "foo/bar/foo.txt", "foo/bar/foo.txt"),
     ],
+    ids=["resolve-flat", "keep-flat", "resolve-nested", "keep-nested", "resolve-deep", "keep-deep"],
 )
 def test_local_save_conflict(resolve, path, expected, empty_txt, local_bucket):
     path = pathlib.PurePath(path)
-
-    if path.parent.parts:
-        (pathlib.Path(local_bucket.destination) / path.parent).mkdir(exist_ok=True, parents=True)
-
-    foo = pathlib.Path(local_bucket.destination) / path
-    foo.touch()
+    precreate_conflicts(local_bucket, path)
 
     local_bucket.resolve_conflicts = resolve
 
-    assert local_bucket.save(empty_txt, path) == pathlib.PurePath(expected)
+    assert str(local_bucket.save(empty_txt, path)) == expected
 
 
 @pytest.mark.parametrize(
@@ -177,17 +159,14 @@ def test_local_save_conflict(resolve, path, expected, empty_txt, local_bucket):
         (True, "foo.txt", "foo_6.txt"),
         (False, "foo.txt", "foo.txt"),
     ],
+    ids=["resolve-no-ext", "keep-no-ext", "resolve-ext", "keep-ext"],
 )
 def test_local_save_multi_conflict(resolve, path, expected, empty_txt, local_bucket):
     path = pathlib.PurePath(path)
-    foo = pathlib.Path(local_bucket.destination) / path
-    foo.touch()
-    for n in range(1, 6):
-        foo_n = pathlib.Path(local_bucket.destination) / f"{path.stem}_{n}{path.suffix}"
-        foo_n.touch()
+    precreate_conflicts(local_bucket, path, count=5)
 
     local_bucket.resolve_conflicts = resolve
-    assert local_bucket.save(empty_txt, path) == pathlib.PurePath(expected)
+    assert str(local_bucket.save(empty_txt, path)) == expected
 
 
 def test_local_delete(local_bucket):
@@ -221,12 +200,11 @@ def test_local_download_not_found(url, app_local):
         assert rv.status_code == 404
 
 
-def test_local_url(app_local, local_bucket):
-    with app_local.test_request_context():
-        url = local_bucket.url("foo.txt")
+def test_local_url(local_request_ctx, local_bucket):
+    url = local_bucket.url("foo.txt")
 
-        assert url == url_for("files_uploads.download_file", filename="foo.txt", _external=True)
-        assert url == local_bucket.signed_url("foo.txt")
+    assert url == url_for("files_uploads.download_file", filename="foo.txt", _external=True)
+    assert url == local_bucket.signed_url("foo.txt")
 
 
 @pytest.mark.parametrize("path, delete_local", [("empty.txt", True), ("files/empty.txt", False)])
@@ -258,51 +236,45 @@ def test_cloud_delete(cloud_bucket, google_bucket_mock):
     cloud_bucket.delete("bar.txt")
 
 
-def test_cloud_url(app_cloud, cloud_bucket):
-    with app_cloud.test_request_context():
-        assert cloud_bucket.url("foo.txt") == "http://google-storage-url/foo.txt"
-        assert cloud_bucket.url("bar.txt") is None
-
-
-def test_cloud_signed_url(app_cloud, cloud_bucket):
-    with app_cloud.test_request_context():
-        assert cloud_bucket.signed_url("foo.txt") == "http://google-storage-signed-url/foo.txt"
-        assert cloud_bucket.signed_url("bar.txt") is None
+@pytest.mark.parametrize(
+    "method, expected",
+    [
+        ("url", "http://google-storage-url/foo.txt"),
+        ("signed_url", "http://google-storage-signed-url/foo.txt"),
+    ],
+)
+def test_cloud_url(method, expected, cloud_request_ctx, cloud_bucket):
+    assert getattr(cloud_bucket, method)("foo.txt") == expected
+    assert getattr(cloud_bucket, method)("bar.txt") is None
 
 
-@pytest.mark.parametrize("name", ("files", "photos"))
-def test_cloud_save_default(name, app_cloud_default, tmpdir, empty_txt):
-    filepath = pathlib.Path(tmpdir) / name / "empty.txt"
+def test_cloud_save_default(app_cloud_default, tmp_path, empty_txt):
+    # Both buckets share one app setup; files is backed by the cloud (local copy deleted
+    # by default) while photos falls back to local storage.
+    for name, persisted in (("files", False), ("photos", True)):
+        filepath = tmp_path / name / "empty.txt"
 
-    assert not filepath.exists()
-    bucket = Bucket(name)
-    bucket.save(empty_txt, name="empty.txt")
-    if name == "photos":
-        assert filepath.exists()
-    else:
         assert not filepath.exists()
+        Bucket(name).save(empty_txt, name="empty.txt")
+        assert filepath.exists() == persisted
 
 
-@pytest.mark.parametrize("name", ("files", "photos"))
-def test_cloud_save_retry(name, app_cloud_retry, tmpdir, empty_txt, google_bucket_error_mock):
-    filepath = pathlib.Path(tmpdir) / name / "empty.txt"
+def test_cloud_save_retry(app_cloud_retry, empty_txt, google_bucket_error_mock):
+    upload_mock = google_bucket_error_mock.get_blob().upload_from_filename
 
-    assert not filepath.exists()
+    # photos uses the default tenacity config and gives up after two attempts
+    with pytest.raises(GoogleCloudError):
+        Bucket("photos").save(empty_txt)
 
-    bucket = Bucket(name)
-    if name == "photos":
-        with pytest.raises(GoogleCloudError):
-            bucket.save(empty_txt)
+    assert upload_mock.call_count == 2
 
-        calls = [mock.call(filepath), mock.call(filepath)]
-        assert google_bucket_error_mock.get_blob().upload_from_filename.call_count == 2
-        assert google_bucket_error_mock.get_blob().upload_from_filename.has_calls(calls)
-    else:
-        bucket.save(empty_txt)
+    # Re-arm the failure sequence so files must retry past the default two-attempt
+    # limit, proving its GOOGLE_STORAGE_FILES_TENACITY override takes effect
+    upload_mock.reset_mock()
+    upload_mock.side_effect = [GoogleCloudError("error 1"), GoogleCloudError("error 2"), None]
 
-        calls = [mock.call(filepath), mock.call(filepath), mock.call(filepath)]
-        assert google_bucket_error_mock.get_blob().upload_from_filename.call_count == 3
-        assert google_bucket_error_mock.get_blob().upload_from_filename.has_calls(calls)
+    Bucket("files").save(empty_txt)
+    assert upload_mock.call_count == 3
 
 
 @pytest.mark.parametrize("file, content", [("foo.txt", "Foo content"), ("bar.txt", "Bar content")])
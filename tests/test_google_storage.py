@@ -7,24 +7,24 @@ from flask_googlestorage.buckets import LocalBucket, CloudBucket
 from flask_googlestorage.exceptions import NotFoundDestinationError
 from flask_googlestorage.utils import get_state
 
+UPLOADS_DEST = Path("/var/uploads")
+
 
 def test_missing_conf(app):
     files = Bucket("files")
-    with pytest.raises(NotFoundDestinationError) as e_info:
+    with pytest.raises(
+        NotFoundDestinationError,
+        match="You must set the 'GOOGLE_STORAGE_LOCAL_DEST' configuration variable",
+    ):
         GoogleStorage(files, app=app)
 
-    assert (
-        str(e_info.value) == "You must set the 'GOOGLE_STORAGE_LOCAL_DEST' configuration variable"
-    )
-
 
-def test_defaults(app_init):
-    storage_config = get_state(app_init)["buckets"]
-    assert storage_config["files"].destination == Path("/var/uploads/files")
-    assert storage_config["photos"].destination == Path("/var/uploads/photos")
+@pytest.mark.parametrize("name", ("files", "photos"))
+def test_defaults(name, app_init):
+    assert get_state(app_init).buckets[name].destination == UPLOADS_DEST / name
 
 
 def test_google_cloud_storage(app_cloud):
-    storage_config = get_state(app_cloud)["buckets"]
+    storage_config = get_state(app_cloud).buckets
     assert isinstance(storage_config["files"], CloudBucket)
     assert isinstance(storage_config["photos"], LocalBucket)
@@ -1,9 +1,28 @@
 import uuid
+from pathlib import PurePath
 from unittest import mock
 
 import pytest
 
-from flask_googlestorage.utils import secure_path
+from flask_googlestorage.utils import allowed_extensions, secure_path
+
+FIXED_UUID = uuid.UUID("a53d500f-bf6a-4978-9240-922a763d31cb")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def fixed_uuid():
+    # Patch once for the whole module instead of wrapping every parametrized case
+    with mock.patch("flask_googlestorage.utils.uuid4", return_value=FIXED_UUID):
+        yield FIXED_UUID
+
+
+@pytest.mark.parametrize(
+    "path, allowed",
+    [("photo.jpg", True), ("photo.png", True), ("malware.exe", False), ("noext", False)],
+)
+def test_allowed_extensions(path, allowed):
+    allows = allowed_extensions("jpg", ".png")
+    assert allows(None, PurePath(path)) == allowed
 
 
 @pytest.mark.parametrize(
@@ -16,6 +35,8 @@ from flask_googlestorage.utils import secure_path
         ("archive.tar.gz", None, False, "archive.tar.gz"),
         ("../../ARCHIVE.TAR.GZ", None, False, "ARCHIVE.TAR.gz"),
         ("foo.txt", None, True, "a53d500f-bf6a-4978-9240-922a763d31cb.txt"),
+        ("..txt", None, True, "a53d500f-bf6a-4978-9240-922a763d31cb.txt"),
+        ("..txt", None, False, "txt.txt"),
         ("foo.", None, True, "a53d500f-bf6a-4978-9240-922a763d31cb"),
         ("foo", None, True, "a53d500f-bf6a-4978-9240-922a763d31cb"),
         ("ignored.txt", "preferred.JPG", False, "preferred.jpg"),
@@ -34,6 +55,4 @@ from flask_googlestorage.utils import secure_path
     ],
 )
 def test_secure_path(filename, name, uuid_name, expected):
-    fixed_uuid = uuid.UUID("a53d500f-bf6a-4978-9240-922a763d31cb")
-    with mock.patch("flask_googlestorage.utils.uuid4", return_value=fixed_uuid):
-        assert str(secure_path(filename, name, uuid_name)) == expected
+    assert str(secure_path(filename, name, uuid_name)) == expected